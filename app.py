@@ -1,17 +1,119 @@
-from flask import Flask, render_template_string
+from flask import Flask, render_template, request, g, jsonify, abort, has_request_context
 import requests
 from datetime import datetime, timedelta, timezone
 import os
 import json
 import time
+import heapq
+import hmac
+import hashlib
+import random
+import threading
+import fcntl
+import re
+import cProfile
+import io
+import pstats
+from collections import deque
+from contextlib import contextmanager
+from urllib.parse import urlsplit
 
 app = Flask(__name__)
 
 # Get API token from environment variable
 API_TOKEN = os.environ.get('FOOTBALL_API_TOKEN', '')
-API_DELAY = int(os.environ.get('FOOTBALL_API_DELAY', '2'))  # delay in seconds between API calls
+API_QUOTA_RESERVE = int(os.environ.get('FOOTBALL_API_QUOTA_RESERVE', '2'))  # requests kept back for live/today matches
+API_RETRY_LIMIT = 2  # retries after a 429 response
 CACHE_FILE = 'matches_cache.json'
+CACHE_LOCK_FILE = 'matches_cache.json.lock'
 CACHE_DURATION = 300  # 5 minutes in seconds
+FAILED_REFRESH_TTL = 30  # seconds before retrying a refresh whose matches fetch failed
+RENDER_CACHE_SIZE = 64  # rendered pages kept per snapshot
+STANDINGS_REFRESH = int(os.environ.get('FOOTBALL_STANDINGS_REFRESH', '1800'))  # seconds between upstream table fetches
+
+# Request profiling: enabled per request with the X-Profile-Token header, a
+# ?profile=<expires>.<hmac-sha256(secret, path:expires)> query parameter
+# (see profile_query()), or by sampling. cProfile dumps need the header.
+PROFILE_SECRET = os.environ.get('FOOTBALL_PROFILE_SECRET', '')
+PROFILE_SAMPLE_RATE = float(os.environ.get('FOOTBALL_PROFILE_SAMPLE_RATE', '0'))  # fraction of requests, 0-1
+PROFILE_LINK_MAX_AGE = 3600  # longest lifetime accepted for a signed ?profile= link
+PROFILE_BUFFER_SIZE = 50  # profiles kept for /admin/profiles
+profile_buffer = deque(maxlen=PROFILE_BUFFER_SIZE)
+
+# Static assets are fingerprinted by content hash and served from /assets/
+# with an immutable Cache-Control header
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+CSS_SOURCE = os.path.join(STATIC_DIR, 'css', 'football-times.css')
+ASSET_MAX_AGE = 31536000  # one year
+assets = {}  # fingerprinted file name -> (body, mimetype)
+asset_urls = {
+    "css": None
+}
+
+# Warmup is started by python app.py, or per worker by the post_fork hook in
+# gunicorn.conf.py; importing the module never starts it
+WARMUP_RETRY_MAX_DELAY = 300  # longest backoff between warmup attempts, in seconds
+warmup_state = {
+    "status": "pending",  # pending, running, retrying or ready
+    "started_at": None,
+    "duration_ms": None,
+    "attempts": 0,
+    "error": None
+}
+news_template = None  # compiled NEWS_TEMPLATE
+
+# Fetch job priorities (lower runs first)
+PRIORITY_LIVE = 0
+PRIORITY_TODAY = 1
+PRIORITY_TABLES = 2
+
+# Leagues that separate teams level on points by goal difference, then goals
+# scored; live tables in other leagues keep the upstream order for ties
+GOAL_DIFFERENCE_TIEBREAK = {"PL"}
+
+# Competition each standings/scorers section of the snapshot belongs to
+SECTION_COMPETITIONS = {
+    "pl_standings": "PL",
+    "la_liga_standings": "PD",
+    "pl_scorers": "PL",
+    "la_liga_scorers": "PD"
+}
+
+# Team/competition index and rendered pages for the current snapshot. The
+# dict is replaced as a whole, never updated in place, so concurrent
+# requests always see an id, index and page cache that belong together.
+snapshot_state = {
+    "id": None,
+    "index": None,
+    "pages": {}  # (team, competition) -> html
+}
+
+# Held while this process refreshes the snapshot in the background
+background_refresh_lock = threading.Lock()
+
+# Remaining request budget as reported by the X-Requests-Available-Minute
+# and X-RequestCounter-Reset response headers
+rate_limit = {
+    "available": None,  # unknown until the first response
+    "reset_at": 0.0     # epoch seconds when the per-minute counter resets
+}
+
+def record_stage(name, started):
+    """Add a stage timing to the current request's profile, if it is being profiled"""
+    if has_request_context() and g.get("profile") is not None:
+        g.profile["stages"].append({
+            "name": name,
+            "ms": round((time.perf_counter() - started) * 1000, 2)
+        })
+
+@contextmanager
+def profile_stage(name):
+    """Time the enclosed block as one stage of the request profile"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, started)
 
 def is_cache_valid():
     """Check if cache file exists and is less than 5 minutes old"""
@@ -30,7 +132,7 @@ def is_cache_valid():
 def load_from_cache():
     """Load data from cache file"""
     try:
-        with open(CACHE_FILE, 'r') as f:
+        with profile_stage("cache_read"), open(CACHE_FILE, 'r') as f:
             data = json.load(f)
             print(f"[DEBUG] Successfully loaded data from cache")
             return data
@@ -41,19 +143,152 @@ def load_from_cache():
 def save_to_cache(data):
     """Save data to cache file"""
     try:
-        with open(CACHE_FILE, 'w') as f:
+        # Write to a temporary file and rename, so readers never see a partial file
+        temp_file = f"{CACHE_FILE}.{os.getpid()}.tmp"
+        with profile_stage("cache_write"), open(temp_file, 'w') as f:
             json.dump(data, f, default=str)
-            print(f"[DEBUG] Successfully saved data to cache")
+        os.replace(temp_file, CACHE_FILE)
+        print(f"[DEBUG] Successfully saved data to cache")
     except Exception as e:
         print(f"[DEBUG] Failed to save to cache: {e}")
 
+@contextmanager
+def cache_refresh_lock():
+    """Hold an exclusive lock, shared by all processes, while the snapshot is rebuilt"""
+    with open(CACHE_LOCK_FILE, 'w') as f:
+        with profile_stage("refresh_lock"):
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def update_rate_limit(r):
+    """Record the remaining quota from the football-data.org rate-limit headers"""
+    available = r.headers.get("X-Requests-Available-Minute")
+    reset = r.headers.get("X-RequestCounter-Reset")
+    try:
+        if available is not None:
+            rate_limit["available"] = int(available)
+        if reset is not None:
+            rate_limit["reset_at"] = time.time() + int(reset)
+    except ValueError:
+        pass
+    if r.status_code == 429:
+        rate_limit["available"] = 0
+        if reset is None:
+            rate_limit["reset_at"] = time.time() + 60
+
+def quota_remaining():
+    """Requests left in the current window, or None if unknown"""
+    if rate_limit["available"] is None:
+        return None
+    if time.time() >= rate_limit["reset_at"]:
+        return None  # counter has reset, budget is unknown again
+    return rate_limit["available"]
+
+def wait_for_quota():
+    """Sleep until the counter resets, but only if the budget is spent"""
+    remaining = quota_remaining()
+    if remaining is None or remaining > 0:
+        return
+    delay = rate_limit["reset_at"] - time.time()
+    if delay > 0:
+        print(f"[DEBUG] Request quota exhausted, waiting {delay:.1f}s for reset")
+        time.sleep(delay)
+
+def api_get(url):
+    """GET a football-data.org endpoint, respecting the remaining quota"""
+    for attempt in range(API_RETRY_LIMIT + 1):
+        with profile_stage("quota_wait"):
+            wait_for_quota()
+        with profile_stage(f"fetch {urlsplit(url).path}"):
+            r = requests.get(url, headers={"X-Auth-Token": API_TOKEN})
+        update_rate_limit(r)
+        print(f"[DEBUG] GET {url} -> {r.status_code} (quota left: {rate_limit['available']})")
+        if r.status_code != 429:
+            break
+    return r
+
+def run_fetch_jobs(jobs):
+    """Run (priority, name, func) jobs in priority order.
+
+    Table jobs are skipped while the quota is down to the reserve, so the
+    budget goes to live and today's matches. Skipped jobs are left out of
+    the returned {name: result} dict.
+    """
+    heap = [(priority, index, name, func) for index, (priority, name, func) in enumerate(jobs)]
+    heapq.heapify(heap)
+    results = {}
+    while heap:
+        priority, _, name, func = heapq.heappop(heap)
+        remaining = quota_remaining()
+        if priority >= PRIORITY_TABLES and remaining is not None and remaining <= API_QUOTA_RESERVE:
+            print(f"[DEBUG] Skipping {name}: quota at reserve ({remaining} left)")
+            continue
+        results[name] = func()
+    return results
+
+def apply_result(rows, team_id, scored, conceded):
+    """Add one match result to a team's standings row"""
+    row = rows.get(team_id)
+    if row is None:
+        return
+    row["playedGames"] += 1
+    row["goalsFor"] += scored
+    row["goalsAgainst"] += conceded
+    row["goalDifference"] = row["goalsFor"] - row["goalsAgainst"]
+    if scored > conceded:
+        row["won"] += 1
+        row["points"] += 3
+    elif scored == conceded:
+        row["draw"] += 1
+        row["points"] += 1
+    else:
+        row["lost"] += 1
+
+def build_live_table(base, matches, code):
+    """Apply in-play and newly finished scores to the last fetched table.
+
+    Returns (table, is_live) where is_live is True if any result not yet
+    in the upstream table was applied.
+    """
+    if not base:
+        return [], False
+
+    table = [dict(row) for row in base["table"]]
+    rows = {row["team"]["id"]: row for row in table}
+    counted = set(base["counted"])
+    is_live = False
+
+    for m in matches:
+        if m["competition"]["code"] != code or m["id"] in counted:
+            continue
+        if m["status"] not in ("IN_PLAY", "LIVE", "PAUSED", "FINISHED"):
+            continue
+        s = m["score"]["fullTime"]
+        if s["home"] is None or s["away"] is None:
+            continue
+        apply_result(rows, m["homeTeam"]["id"], s["home"], s["away"])
+        apply_result(rows, m["awayTeam"]["id"], s["away"], s["home"])
+        is_live = True
+
+    if is_live:
+        # Ties fall back to the upstream position, which already applies each
+        # league's own rules (La Liga uses head-to-head before goal difference)
+        if code in GOAL_DIFFERENCE_TIEBREAK:
+            table.sort(key=lambda row: (-row["points"], -row["goalDifference"], -row["goalsFor"], row["position"]))
+        else:
+            table.sort(key=lambda row: (-row["points"], row["position"]))
+        for position, row in enumerate(table, 1):
+            row["position"] = position
+    return table, is_live
+
 
 def get_premier_league_standings():
     """Get Premier League standings"""
     try:
-        time.sleep(API_DELAY)  # configurable delay for rate limiting
-        r = requests.get("https://api.football-data.org/v4/competitions/PL/standings",
-                         headers={"X-Auth-Token": API_TOKEN})
+        r = api_get("https://api.football-data.org/v4/competitions/PL/standings")
         if r.status_code == 200:
             data = r.json()
             standings = data.get("standings", [])
@@ -66,9 +301,7 @@ def get_premier_league_standings():
 def get_la_liga_standings():
     """Get La Liga standings"""
     try:
-        time.sleep(API_DELAY)  # configurable delay for rate limiting
-        r = requests.get("https://api.football-data.org/v4/competitions/PD/standings",
-                         headers={"X-Auth-Token": API_TOKEN})
+        r = api_get("https://api.football-data.org/v4/competitions/PD/standings")
         if r.status_code == 200:
             data = r.json()
             standings = data.get("standings", [])
@@ -81,9 +314,7 @@ def get_la_liga_standings():
 def get_premier_league_scorers():
     """Get Premier League top scorers"""
     try:
-        time.sleep(API_DELAY)  # configurable delay for rate limiting
-        r = requests.get("https://api.football-data.org/v4/competitions/PL/scorers",
-                         headers={"X-Auth-Token": API_TOKEN})
+        r = api_get("https://api.football-data.org/v4/competitions/PL/scorers")
         if r.status_code == 200:
             data = r.json()
             return data.get("scorers", [])
@@ -94,9 +325,7 @@ def get_premier_league_scorers():
 def get_la_liga_scorers():
     """Get La Liga top scorers"""
     try:
-        time.sleep(API_DELAY)  # configurable delay for rate limiting
-        r = requests.get("https://api.football-data.org/v4/competitions/PD/scorers",
-                         headers={"X-Auth-Token": API_TOKEN})
+        r = api_get("https://api.football-data.org/v4/competitions/PD/scorers")
         if r.status_code == 200:
             data = r.json()
             return data.get("scorers", [])
@@ -107,9 +336,7 @@ def get_la_liga_scorers():
 def get_bundesliga_standings():
     """Get Bundesliga standings"""
     try:
-        time.sleep(API_DELAY)  # configurable delay for rate limiting
-        r = requests.get("https://api.football-data.org/v4/competitions/BL1/standings",
-                         headers={"X-Auth-Token": API_TOKEN})
+        r = api_get("https://api.football-data.org/v4/competitions/BL1/standings")
         if r.status_code == 200:
             data = r.json()
             standings = data.get("standings", [])
@@ -122,9 +349,7 @@ def get_bundesliga_standings():
 def get_bundesliga_scorers():
     """Get Bundesliga top scorers"""
     try:
-        time.sleep(API_DELAY)  # configurable delay for rate limiting
-        r = requests.get("https://api.football-data.org/v4/competitions/BL1/scorers",
-                         headers={"X-Auth-Token": API_TOKEN})
+        r = api_get("https://api.football-data.org/v4/competitions/BL1/scorers")
         if r.status_code == 200:
             data = r.json()
             return data.get("scorers", [])
@@ -135,9 +360,7 @@ def get_bundesliga_scorers():
 def get_serie_a_standings():
     """Get Serie A standings"""
     try:
-        time.sleep(API_DELAY)  # configurable delay for rate limiting
-        r = requests.get("https://api.football-data.org/v4/competitions/SA/standings",
-                         headers={"X-Auth-Token": API_TOKEN})
+        r = api_get("https://api.football-data.org/v4/competitions/SA/standings")
         if r.status_code == 200:
             data = r.json()
             standings = data.get("standings", [])
@@ -150,9 +373,7 @@ def get_serie_a_standings():
 def get_serie_a_scorers():
     """Get Serie A top scorers"""
     try:
-        time.sleep(API_DELAY)  # configurable delay for rate limiting
-        r = requests.get("https://api.football-data.org/v4/competitions/SA/scorers",
-                         headers={"X-Auth-Token": API_TOKEN})
+        r = api_get("https://api.football-data.org/v4/competitions/SA/scorers")
         if r.status_code == 200:
             data = r.json()
             return data.get("scorers", [])
@@ -163,9 +384,7 @@ def get_serie_a_scorers():
 def get_ligue1_standings():
     """Get Ligue 1 standings"""
     try:
-        time.sleep(API_DELAY)  # configurable delay for rate limiting
-        r = requests.get("https://api.football-data.org/v4/competitions/FL1/standings",
-                         headers={"X-Auth-Token": API_TOKEN})
+        r = api_get("https://api.football-data.org/v4/competitions/FL1/standings")
         if r.status_code == 200:
             data = r.json()
             standings = data.get("standings", [])
@@ -178,9 +397,7 @@ def get_ligue1_standings():
 def get_ligue1_scorers():
     """Get Ligue 1 top scorers"""
     try:
-        time.sleep(API_DELAY)  # configurable delay for rate limiting
-        r = requests.get("https://api.football-data.org/v4/competitions/FL1/scorers",
-                         headers={"X-Auth-Token": API_TOKEN})
+        r = api_get("https://api.football-data.org/v4/competitions/FL1/scorers")
         if r.status_code == 200:
             data = r.json()
             return data.get("scorers", [])
@@ -188,16 +405,63 @@ def get_ligue1_scorers():
         pass
     return []
 
+def is_snapshot_fresh(data):
+    """Check a snapshot loaded from a valid cache file is not due a retry"""
+    if data.get("matches_source", "api") == "api":
+        return True
+    age = snapshot_age()
+    return age is not None and age < FAILED_REFRESH_TTL
+
 def get_football_data():
     # Check if we have valid cached data
     print(f"[DEBUG] Checking cache validity...")
     if is_cache_valid():
         cached_data = load_from_cache()
-        if cached_data:
+        if cached_data and is_snapshot_fresh(cached_data):
             print(f"[DEBUG] Using cached data")
             return cached_data
 
+    # With a previous snapshot to show, refresh in the background instead of
+    # making the visitor wait on the API and its rate limit
+    previous = load_from_cache()
+    if previous:
+        start_background_refresh()
+        print(f"[DEBUG] Serving previous snapshot while refreshing")
+        return previous
+
+    return refresh_football_data_locked()
+
+def refresh_football_data_locked():
+    """Rebuild the snapshot, unless another process or thread just did"""
+    # Only one process/thread rebuilds the snapshot; the rest wait and reuse it
+    with cache_refresh_lock():
+        if is_cache_valid():
+            cached_data = load_from_cache()
+            if cached_data and is_snapshot_fresh(cached_data):
+                print(f"[DEBUG] Snapshot rebuilt while waiting, using cached data")
+                return cached_data
+        with profile_stage("refresh"):
+            return refresh_football_data()
+
+def background_refresh():
+    """Refresh the snapshot outside of any request"""
+    try:
+        refresh_football_data_locked()
+    except Exception as e:
+        print(f"[DEBUG] Background refresh failed: {e}")
+    finally:
+        background_refresh_lock.release()
+
+def start_background_refresh():
+    """Start a background refresh unless this process is already running one"""
+    if background_refresh_lock.acquire(blocking=False):
+        threading.Thread(target=background_refresh, name="refresh", daemon=True).start()
+
+def refresh_football_data():
+    """Fetch fresh data from the API and save it as the new snapshot"""
     print(f"[DEBUG] Cache miss - fetching fresh data from API")
+    # Expired snapshot, used for anything the scheduler skips
+    previous = load_from_cache() or {}
     
     # Get date range (3 days back to today) - using IST
     today_utc = datetime.now(timezone.utc)
@@ -208,20 +472,65 @@ def get_football_data():
     date_from_display = (today_ist - timedelta(days=3)).strftime('%B %d')
     date_to_display = today_ist.strftime('%B %d, %Y')
 
-    # Get matches from API
-    time.sleep(10)  # 10 second delay for rate limiting
-    r = requests.get(f"https://api.football-data.org/v4/matches?dateFrom={date_from}&dateTo={date_to}",
-                     headers={"X-Auth-Token": API_TOKEN})
-    
-    data = r.json()
-    matches = data.get("matches", [])
-    
-    # Get standings and scorers for Premier League and La Liga only
-    pl_standings = get_premier_league_standings()
-    la_liga_standings = get_la_liga_standings()
+    def get_matches():
+        r = api_get(f"https://api.football-data.org/v4/matches?dateFrom={date_from}&dateTo={date_to}")
+        if r.status_code != 200:
+            print(f"[DEBUG] Matches fetch failed with status {r.status_code}")
+            return None
+        data = r.json()
+        return data.get("matches", [])
+
+    # Matches go first; they are the live ones if the last snapshot had games in play
+    had_live = any(m["status"] in ("IN_PLAY", "LIVE", "PAUSED")
+                   for league in previous.get("leagues", []) for m in league["matches"])
+
+    # Upstream tables only change after full time, so they are only
+    # re-fetched every STANDINGS_REFRESH seconds to reconcile the live table
+    standings_base = dict(previous.get("standings_base", {}))
+    fetched_at = time.time()
+
+    def standings_due(code):
+        base = standings_base.get(code)
+        return not base or fetched_at - base["fetched_at"] >= STANDINGS_REFRESH
+
+    # Get matches, plus standings and scorers for Premier League and La Liga only
+    jobs = [(PRIORITY_LIVE if had_live else PRIORITY_TODAY, "matches", get_matches)]
+    if standings_due("PL"):
+        jobs.append((PRIORITY_TABLES, "pl_standings", get_premier_league_standings))
+    if standings_due("PD"):
+        jobs.append((PRIORITY_TABLES, "la_liga_standings", get_la_liga_standings))
+    jobs.append((PRIORITY_TABLES, "pl_scorers", get_premier_league_scorers))
+    jobs.append((PRIORITY_TABLES, "la_liga_scorers", get_la_liga_scorers))
+    fetched = run_fetch_jobs(jobs)
+
+    matches = fetched["matches"]
+    matches_ok = matches is not None
+    if not matches_ok:
+        matches = []
+    normalize_started = time.perf_counter()
+    for code, key in (("PL", "pl_standings"), ("PD", "la_liga_standings")):
+        # Without this refresh's matches we can't tell which results the
+        # new table already includes, so keep the previous base
+        if fetched.get(key) and matches_ok:
+            # Games already finished are assumed to be in the fresh table
+            counted = [m["id"] for m in matches
+                       if m["competition"]["code"] == code and m["status"] == "FINISHED"]
+            standings_base[code] = {"table": fetched[key], "counted": counted, "fetched_at": fetched_at}
 
-    pl_scorers = get_premier_league_scorers()
-    la_liga_scorers = get_la_liga_scorers()
+    pl_standings, pl_standings_live = build_live_table(standings_base.get("PL"), matches, "PL")
+    la_liga_standings, la_liga_standings_live = build_live_table(standings_base.get("PD"), matches, "PD")
+    if not matches_ok and previous:
+        # Live tables need the matches feed, so keep the last ones built from it
+        pl_standings = previous.get("pl_standings", pl_standings)
+        la_liga_standings = previous.get("la_liga_standings", la_liga_standings)
+        pl_standings_live = previous.get("pl_standings_live", pl_standings_live)
+        la_liga_standings_live = previous.get("la_liga_standings_live", la_liga_standings_live)
+    pl_scorers = fetched.get("pl_scorers", previous.get("pl_scorers", []))
+    la_liga_scorers = fetched.get("la_liga_scorers", previous.get("la_liga_scorers", []))
+    # Keep each scorer's rank in the full list, so filtered pages show it too
+    for scorers in (pl_scorers, la_liga_scorers):
+        for rank, scorer in enumerate(scorers, 1):
+            scorer["rank"] = rank
 
     # Competition name mapping for better display
     competition_display_names = {
@@ -315,6 +624,8 @@ def get_football_data():
             match_info = {
                 "home_team": h,
                 "away_team": a,
+                "home_id": m["homeTeam"]["id"],
+                "away_id": m["awayTeam"]["id"],
                 "date_time": date_time,
                 "datetime_obj": dt_ist,  # Store actual datetime for sorting
                 "status": status,
@@ -335,14 +646,30 @@ def get_football_data():
         
         processed_leagues.append({
             "name": comp_full,
+            "code": matches_list[0]["competition"]["code"],
             "url": f"https://www.google.com/search?q={comp_full}",
             "count": len(matches_list),
             "matches": processed_matches
         })
 
+    total_matches = len(matches)
+    pl_count = len([m for m in matches if m["competition"]["code"] == "PL"])
+    if matches_ok:
+        matches_source = "api"
+    elif "leagues" in previous:
+        # Keep showing the last good matches rather than an empty page
+        matches_source = "previous"
+        processed_leagues = previous["leagues"]
+        total_matches = previous.get("total_matches", 0)
+        pl_count = previous.get("pl_count", 0)
+    else:
+        matches_source = "none"
+
     result = {
-        "total_matches": len(matches),
-        "pl_count": len([m for m in matches if m["competition"]["code"] == "PL"]),
+        "snapshot_id": fetched_at,
+        "matches_source": matches_source,  # api, previous (fetch failed) or none
+        "total_matches": total_matches,
+        "pl_count": pl_count,
         "date_from": date_from,
         "date_to": date_to,
         "date_from_display": date_from_display,
@@ -351,258 +678,217 @@ def get_football_data():
         "leagues": processed_leagues,
         "pl_standings": pl_standings,
         "la_liga_standings": la_liga_standings,
+        "pl_standings_live": pl_standings_live,
+        "la_liga_standings_live": la_liga_standings_live,
+        "standings_base": standings_base,
         "pl_scorers": pl_scorers,
         "la_liga_scorers": la_liga_scorers
     }
     
+    record_stage("normalize", normalize_started)
+
     # Save to cache
     save_to_cache(result)
     
     return result
 
-@app.route('/news')
-def index():
-    data = get_football_data()
-    
-    html_template = '''
+def is_admin_request():
+    """Check the X-Profile-Token header against the profiling secret"""
+    token = request.headers.get("X-Profile-Token", "")
+    return bool(PROFILE_SECRET) and hmac.compare_digest(token, PROFILE_SECRET)
+
+def profile_signature(path, expires):
+    """Signature for the ?profile= query parameter of a path"""
+    message = f"{path}:{expires}".encode()
+    return hmac.new(PROFILE_SECRET.encode(), message, hashlib.sha256).hexdigest()
+
+def profile_query(path, ttl=PROFILE_LINK_MAX_AGE):
+    """Build a ?profile= value for a path that expires after ttl seconds"""
+    expires = int(time.time()) + ttl
+    return f"{expires}.{profile_signature(path, expires)}"
+
+def is_signed_profile_request():
+    """Check the ?profile= signature and that it has not expired"""
+    if not PROFILE_SECRET:
+        return False
+    expires, _, signature = request.args.get("profile", "").partition(".")
+    try:
+        expires = int(expires)
+    except ValueError:
+        return False
+    now = time.time()
+    if not now < expires <= now + PROFILE_LINK_MAX_AGE:
+        return False
+    return hmac.compare_digest(signature, profile_signature(request.path, expires))
+
+@app.before_request
+def start_profile():
+    """Start profiling the request if an admin asked for it or it was sampled"""
+    g.profile = None
+    if request.endpoint in ("admin_profiles", "healthz", "readyz", "asset"):
+        return
+    admin = is_admin_request()
+    requested = admin or is_signed_profile_request()
+    sampled = not requested and random.random() < PROFILE_SAMPLE_RATE
+    if not (requested or sampled):
+        return
+
+    g.profile = {
+        "id": f"{time.time():.6f}",
+        "path": request.full_path,
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "sampled": sampled,
+        "stages": []
+    }
+    g.profile_started = time.perf_counter()
+    # Full cProfile dumps only for requests carrying the admin token
+    g.profiler = None
+    if admin and request.headers.get("X-Profile-Mode") == "cprofile":
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+@app.after_request
+def tag_profile(response):
+    """Tag the response with the profile id"""
+    profile = g.get("profile")
+    if profile is not None:
+        profile["status"] = response.status_code
+        response.headers["X-Profile-Id"] = profile["id"]
+    return response
+
+@app.teardown_request
+def finish_profile(exc):
+    """Stop the profiler and store the profile, even if the view raised"""
+    profile = g.get("profile")
+    if profile is None:
+        return
+    g.profile = None
+    profiler = g.get("profiler")
+    if profiler is not None:
+        profiler.disable()
+        g.profiler = None
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(30)
+        profile["cprofile"] = out.getvalue()
+    profile["total_ms"] = round((time.perf_counter() - g.profile_started) * 1000, 2)
+    if exc is not None:
+        profile["status"] = 500
+        profile["error"] = repr(exc)
+    profile_buffer.append(profile)
+
+@app.route('/admin/profiles')
+def admin_profiles():
+    """Recent request profiles, newest first"""
+    if not is_admin_request():
+        abort(404)
+    return jsonify(list(reversed(profile_buffer)))
+
+def team_keys(team):
+    """Index keys a team can be looked up by: lowercase shortName and id"""
+    keys = [str(team.get("id"))]
+    if team.get("shortName"):
+        keys.append(team["shortName"].lower())
+    return keys
+
+def build_team_index(data):
+    """Build the team and competition inverted index for a snapshot.
+
+    Entries hold positions into the snapshot lists, e.g.
+    teams["arsenal"]["matches"][league_pos] -> [match_pos, ...]
+    """
+    teams = {}
+    competitions = {}
+
+    def entry(key):
+        if key not in teams:
+            teams[key] = {"matches": {}, "sections": {}}
+        return teams[key]
+
+    for league_pos, league in enumerate(data["leagues"]):
+        competitions.setdefault(league.get("code"), []).append(league_pos)
+        for match_pos, match in enumerate(league["matches"]):
+            for team in ({"id": match.get("home_id"), "shortName": match["home_team"]},
+                         {"id": match.get("away_id"), "shortName": match["away_team"]}):
+                for key in team_keys(team):
+                    positions = entry(key)["matches"].setdefault(league_pos, [])
+                    if match_pos not in positions:
+                        positions.append(match_pos)
+
+    for section, code in SECTION_COMPETITIONS.items():
+        competitions.setdefault(code, [])
+        for pos, item in enumerate(data.get(section, [])):
+            for key in team_keys(item["team"]):
+                entry(key)["sections"].setdefault(section, []).append(pos)
+
+    return {"teams": teams, "competitions": competitions}
+
+def get_snapshot_state(data):
+    """Return the index and page cache for this snapshot, rebuilding them when the snapshot changes"""
+    global snapshot_state
+    state = snapshot_state
+    snapshot_id = data.get("snapshot_id", data["current_time_ist"])
+    if state["id"] != snapshot_id:
+        print(f"[DEBUG] New snapshot {snapshot_id}, rebuilding team index")
+        state = {
+            "id": snapshot_id,
+            "index": build_team_index(data),
+            "pages": {}
+        }
+        snapshot_state = state
+    return state
+
+def filter_snapshot(data, index, team=None, competition=None):
+    """Return a copy of the snapshot limited to one team and/or competition"""
+    filtered = dict(data)
+    leagues = range(len(data["leagues"]))
+    sections = {section: range(len(data.get(section, []))) for section in SECTION_COMPETITIONS}
+
+    if team is not None:
+        entry = index["teams"].get(team, {"matches": {}, "sections": {}})
+        match_positions = entry["matches"]
+        leagues = sorted(match_positions)
+        sections = entry["sections"]
+    else:
+        match_positions = None
+
+    if competition is not None:
+        allowed = set(index["competitions"].get(competition, []))
+        leagues = [pos for pos in leagues if pos in allowed]
+        sections = {section: positions for section, positions in sections.items()
+                    if SECTION_COMPETITIONS[section] == competition}
+
+    filtered_leagues = []
+    for pos in leagues:
+        league = data["leagues"][pos]
+        if match_positions is not None:
+            league = dict(league)
+            league["matches"] = [league["matches"][i] for i in match_positions[pos]]
+            league["count"] = len(league["matches"])
+        filtered_leagues.append(league)
+    filtered["leagues"] = filtered_leagues
+    filtered["total_matches"] = sum(league["count"] for league in filtered_leagues)
+
+    for section in SECTION_COMPETITIONS:
+        items = data.get(section, [])
+        filtered[section] = [items[i] for i in sections.get(section, [])]
+
+    filtered["filter_label"] = " / ".join(value for value in (team, competition) if value)
+    return filtered
+
+NEWS_TEMPLATE = '''
 <!DOCTYPE html>
 <html>
 <head>
     <title>The Football Times</title>
-    <link href="https://fonts.googleapis.com/css2?family=Cinzel:wght@400;600;700&family=Cinzel+Decorative:wght@700&family=Uncial+Antiqua&display=swap" rel="stylesheet">
-    <style>
-        body {
-            font-family: 'Cinzel', 'Uncial Antiqua', 'Old English Text MT', 'Times New Roman', serif;
-            max-width: 800px;
-            margin: 0 auto;
-            padding: 20px;
-            background: #f5f1e8;
-            color: #2c1810;
-            line-height: 1.4;
-        }
-        .header {
-            text-align: center;
-            border-bottom: 3px double #000;
-            margin-bottom: 20px;
-            padding-bottom: 15px;
-        }
-        .masthead {
-            font-family: 'Cinzel Decorative', 'Old English Text MT', 'Uncial Antiqua', serif;
-            font-size: 42px;
-            font-weight: bold;
-            margin: 0;
-            text-transform: uppercase;
-            letter-spacing: 3px;
-            text-shadow: 1px 1px 2px rgba(0,0,0,0.3);
-        }
-        .date-line {
-            font-family: 'Cinzel', serif;
-            font-size: 12px;
-            text-transform: uppercase;
-            margin: 5px 0 15px 0;
-            letter-spacing: 2px;
-            font-weight: 600;
-        }
-        .stats {
-            font-size: 14px;
-            font-style: italic;
-            margin: 10px 0;
-        }
-        .columns {
-            display: block;
-            margin-top: 20px;
-        }
-        
-        
-        .standings-section {
-            background: #fff;
-            border: 2px solid #000;
-            padding: 15px;
-            margin-bottom: 25px;
-            break-inside: avoid;
-        }
-        
-        .standings-table {
-            width: 100%;
-            border-collapse: collapse;
-            font-size: 12px;
-        }
-        
-        .standings-table th,
-        .standings-table td {
-            padding: 6px 8px;
-            text-align: left;
-            border-bottom: 1px dotted #ccc;
-        }
-        
-        .standings-table th {
-            font-family: 'Cinzel', serif;
-            font-weight: bold;
-            border-bottom: 2px solid #000;
-            font-size: 11px;
-            text-transform: uppercase;
-            letter-spacing: 1px;
-        }
-        
-        .standings-table .pos {
-            text-align: center;
-            width: 30px;
-        }
-        
-        .standings-table .team {
-            width: 150px;
-        }
-        
-        .standings-table .stats {
-            text-align: center;
-            width: 40px;
-        }
-        
-        .scorers-section {
-            background: #fff;
-            border: 2px solid #000;
-            padding: 15px;
-            margin-bottom: 25px;
-            break-inside: avoid;
-        }
-        
-        .scorers-list {
-            list-style: none;
-            padding: 0;
-            margin: 0;
-        }
-        
-        .scorer-item {
-            padding: 8px 0;
-            border-bottom: 1px dotted #ccc;
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            font-size: 13px;
-        }
-        
-        .scorer-item:last-child {
-            border-bottom: none;
-        }
-        
-        .scorer-info {
-            display: flex;
-            align-items: center;
-        }
-        
-        .scorer-pos {
-            width: 25px;
-            font-weight: bold;
-            text-align: center;
-        }
-        
-        .scorer-name {
-            font-weight: bold;
-            margin-right: 10px;
-        }
-        
-        .scorer-team {
-            color: #666;
-            font-size: 11px;
-        }
-        
-        .scorer-goals {
-            font-weight: bold;
-            font-size: 14px;
-        }
-        
-        .matches-section {
-            background: #fff;
-            border: 2px solid #000;
-            padding: 15px;
-            margin-bottom: 25px;
-            break-inside: avoid;
-        }
-        
-        .matches-list {
-            list-style: none;
-            padding: 0;
-            margin: 0;
-        }
-        
-        .matches-table {
-            width: 100%;
-            border-collapse: collapse;
-            font-size: 12px;
-        }
-        
-        .matches-table th,
-        .matches-table td {
-            padding: 8px 10px;
-            text-align: left;
-            border-bottom: 1px dotted #ccc;
-        }
-        
-        .matches-table th {
-            font-family: 'Cinzel', serif;
-            font-weight: bold;
-            border-bottom: 2px solid #000;
-            font-size: 11px;
-            text-transform: uppercase;
-            letter-spacing: 1px;
-        }
-        
-        .matches-table .match-time {
-            text-align: center;
-            width: 80px;
-            font-family: monospace;
-            color: #666;
-        }
-        
-        .matches-table .match-teams {
-            font-weight: bold;
-        }
-        
-        .matches-table .match-score {
-            text-align: center;
-            width: 60px;
-            font-weight: bold;
-            color: #2c1810;
-        }
-        
-        .matches-table .status-icon {
-            text-align: center;
-            width: 30px;
-        }
-        
-        
-        .section-header {
-            font-family: 'Cinzel', 'Uncial Antiqua', 'Old English Text MT', serif;
-            font-size: 20px;
-            font-weight: bold;
-            text-transform: uppercase;
-            border-bottom: 2px solid #000;
-            padding-bottom: 5px;
-            margin-bottom: 15px;
-            letter-spacing: 2px;
-            text-shadow: 0.5px 0.5px 1px rgba(0,0,0,0.2);
-        }
-        .match-line {
-            font-size: 13px;
-            margin: 8px 0;
-            padding-left: 15px;
-            border-left: 2px solid #ddd;
-            font-family: monospace;
-        }
-        .finished {
-            font-weight: bold;
-        }
-        .time {
-            font-weight: normal;
-            color: #666;
-        }
-    </style>
+    <link href="https://fonts.googleapis.com/css2?family=Cinzel:wght@400;600;700&family=Cinzel+Decorative:wght@700&family=Uncial+Antiqua&display=swap" rel="stylesheet" media="print" onload="this.media='all'">
+    <noscript><link href="https://fonts.googleapis.com/css2?family=Cinzel:wght@400;600;700&family=Cinzel+Decorative:wght@700&family=Uncial+Antiqua&display=swap" rel="stylesheet"></noscript>
+    <link rel="stylesheet" href="{{ assets.css }}">
 </head>
 <body>
     <div class="header">
         <h1 class="masthead">The Football Times</h1>
         <div class="date-line">{{ data.current_time_ist }} IST</div>
-        <div class="stats">{{ data.total_matches }} total matches reported</div>
+        <div class="stats">{{ data.total_matches }} total matches reported{% if data.filter_label %} for {{ data.filter_label }}{% endif %}</div>
     </div>
 
     <div class="columns">
@@ -647,7 +933,7 @@ def index():
         <!-- League Tables -->
         {% if data.pl_standings %}
         <div class="standings-section">
-            <div class="section-header" style="margin-bottom: 15px;">Premier League Table</div>
+            <div class="section-header" style="margin-bottom: 15px;">Premier League Table{% if data.pl_standings_live %} (Live){% endif %}</div>
             <table class="standings-table">
                 <thead>
                     <tr>
@@ -685,7 +971,7 @@ def index():
 
         {% if data.la_liga_standings %}
         <div class="standings-section">
-            <div class="section-header" style="margin-bottom: 15px;">La Liga Table</div>
+            <div class="section-header" style="margin-bottom: 15px;">La Liga Table{% if data.la_liga_standings_live %} (Live){% endif %}</div>
             <table class="standings-table">
                 <thead>
                     <tr>
@@ -729,7 +1015,7 @@ def index():
                 {% for scorer in data.pl_scorers[:5] %}
                 <li class="scorer-item">
                     <div class="scorer-info">
-                        <div class="scorer-pos">{{ loop.index }}</div>
+                        <div class="scorer-pos">{{ scorer.rank or loop.index }}</div>
                         <div>
                             <div class="scorer-name">{{ scorer.player.name }}</div>
                             <div class="scorer-team">{{ scorer.team.shortName }}</div>
@@ -749,7 +1035,7 @@ def index():
                 {% for scorer in data.la_liga_scorers[:5] %}
                 <li class="scorer-item">
                     <div class="scorer-info">
-                        <div class="scorer-pos">{{ loop.index }}</div>
+                        <div class="scorer-pos">{{ scorer.rank or loop.index }}</div>
                         <div>
                             <div class="scorer-name">{{ scorer.player.name }}</div>
                             <div class="scorer-team">{{ scorer.team.shortName }}</div>
@@ -768,9 +1054,153 @@ def index():
     </div>
 </body>
 </html>
-    '''
-    
-    return render_template_string(html_template, data=data, datetime=datetime)
+'''
+
+def minify_css(css):
+    """Strip comments and whitespace from a stylesheet"""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};:,])\s*', r'\1', css)
+    return css.replace(';}', '}').strip()
+
+def fingerprint_asset(name, body, mimetype):
+    """Register an asset under a content-hashed name and return its URL"""
+    digest = hashlib.sha256(body).hexdigest()[:12]
+    base, ext = os.path.splitext(name)
+    hashed_name = f"{base}.{digest}{ext}"
+    assets[hashed_name] = (body, mimetype)
+    return f"/assets/{hashed_name}"
+
+def build_assets():
+    """Fingerprint the minified stylesheet"""
+    with open(CSS_SOURCE, 'r') as f:
+        css = minify_css(f.read())
+    asset_urls["css"] = fingerprint_asset("football-times.css", css.encode(), "text/css")
+    print(f"[DEBUG] Built assets: {', '.join(assets)}")
+
+def get_news_template():
+    """Compile the /news template once and reuse it"""
+    global news_template
+    if news_template is None:
+        news_template = app.jinja_env.from_string(NEWS_TEMPLATE)
+    return news_template
+
+def render_news_page(data, team=None, competition=None):
+    """Render /news for a snapshot, optionally filtered, using the page cache"""
+    with profile_stage("index"):
+        state = get_snapshot_state(data)
+    team_index = state["index"]
+
+    page_key = (team, competition)
+    page = state["pages"].get(page_key)
+    if page is not None:
+        return page
+
+    if team or competition:
+        data = filter_snapshot(data, team_index, team, competition)
+
+    template = get_news_template()
+    with profile_stage("render"):
+        page = render_template(template, data=data, datetime=datetime, assets=asset_urls)
+
+    # Only cache pages for teams/competitions that exist in this snapshot
+    known = ((team is None or team in team_index["teams"]) and
+             (competition is None or competition in team_index["competitions"]))
+    if known and len(state["pages"]) < RENDER_CACHE_SIZE:
+        state["pages"][page_key] = page
+    return page
+
+def snapshot_age():
+    """Seconds since the cached snapshot was written, or None if there is none"""
+    if not os.path.exists(CACHE_FILE):
+        return None
+    return time.time() - os.path.getmtime(CACHE_FILE)
+
+def has_match_data(data):
+    """Check the snapshot holds matches from the API, now or from an earlier refresh"""
+    return data.get("matches_source", "api") != "none"
+
+def mark_ready():
+    """Record that a snapshot has been built and rendered"""
+    if warmup_state["status"] != "ready":
+        warmup_state["status"] = "ready"
+        warmup_state["error"] = None
+        print(f"[DEBUG] Ready after {warmup_state['attempts']} warmup attempt(s)")
+
+def warmup():
+    """Load or build the snapshot, compile the template and pre-render /news.
+
+    Failed attempts are retried with exponential backoff until one succeeds
+    or a /news request has rendered a snapshot in the meantime.
+    """
+    warmup_state["started_at"] = datetime.now(timezone.utc).isoformat()
+    started = time.perf_counter()
+    delay = 5
+    while warmup_state["status"] != "ready":
+        warmup_state["status"] = "running"
+        warmup_state["attempts"] += 1
+        try:
+            with app.test_request_context('/news'):
+                data = get_football_data()
+                if not has_match_data(data):
+                    raise RuntimeError("matches fetch failed, snapshot has no match data")
+                render_news_page(data)
+            mark_ready()
+            warmup_state["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        except Exception as e:
+            print(f"[DEBUG] Warmup attempt {warmup_state['attempts']} failed: {e}, retrying in {delay}s")
+            warmup_state["status"] = "retrying"
+            warmup_state["error"] = str(e)
+            time.sleep(delay)
+            delay = min(delay * 2, WARMUP_RETRY_MAX_DELAY)
+
+def start_warmup():
+    """Run the warmup in the background so the liveness probe answers straight away"""
+    threading.Thread(target=warmup, name="warmup", daemon=True).start()
+
+@app.route('/news')
+def index():
+    data = get_football_data()
+    team = request.args.get('team', '').strip().lower() or None
+    competition = request.args.get('competition', '').strip().upper() or None
+    page = render_news_page(data, team, competition)
+    # A request that renders real match data also makes a failed warmup ready
+    if has_match_data(data):
+        mark_ready()
+    return page
+
+@app.route('/assets/<name>')
+def asset(name):
+    """Serve a fingerprinted asset; its URL changes whenever the content does"""
+    if name not in assets:
+        abort(404)
+    body, mimetype = assets[name]
+    response = app.response_class(body, mimetype=mimetype)
+    response.headers["Cache-Control"] = f"public, max-age={ASSET_MAX_AGE}, immutable"
+    return response
+
+@app.route('/healthz')
+def healthz():
+    """Liveness probe: the process is up and serving requests"""
+    return jsonify({"status": "ok"})
+
+@app.route('/readyz')
+def readyz():
+    """Readiness probe: warmup has finished and a snapshot is on disk"""
+    age = snapshot_age()
+    ready = warmup_state["status"] == "ready" and age is not None
+    body = {
+        "ready": ready,
+        "warmup": warmup_state,
+        "snapshot_age": round(age, 1) if age is not None else None,
+        "snapshot_max_age": CACHE_DURATION
+    }
+    return jsonify(body), 200 if ready else 503
+
+build_assets()
 
 if __name__ == '__main__':
+    # With the debug reloader, only warm up the child process that serves requests
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_warmup()
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,15 @@
+# Gunicorn settings for The Football Times: gunicorn app:app
+bind = "0.0.0.0:5000"
+workers = 2
+threads = 4
+
+
+def post_fork(server, worker):
+    """Start the warmup in each worker once it has been forked.
+
+    Works with and without --preload. Workers share the snapshot on disk,
+    so only the first one fetches from the API; the others wait on the
+    cache lock and then load what it saved.
+    """
+    from app import start_warmup
+    start_warmup()